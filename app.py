@@ -1,10 +1,22 @@
 import os
 import re
+import json
+import httplib2
+import requests
 from typing import Dict, Any
 from dotenv import load_dotenv
 from euriai import EuriaiClient
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from resilience import (
+    CircuitOpenError,
+    DegradedFallback,
+    TranscriptFetchError,
+    UpstreamTimeoutError,
+    breaker_from_env,
+    is_upstream_request_error,
+    resilience_status
+)
 
 # Load environment variables
 load_dotenv()
@@ -24,12 +36,53 @@ client = EuriaiClient(
     model="gpt-4.1-mini"
 )
 
-# Initialize YouTube API client
-youtube = build("youtube", "v3", developerKey=youtube_api_key)
-
 # Maximum transcript length to process
 MAX_TRANSCRIPT_LENGTH = 8000
 
+# Default seconds to wait for each upstream (override with <PREFIX>_CALL_TIMEOUT);
+# a 3000-token completion can legitimately take over a minute
+EURIAI_CALL_TIMEOUT = 120.0
+YOUTUBE_CALL_TIMEOUT = 20.0
+
+# HttpError reasons that mean the YouTube API itself is unusable (quota or key problems)
+UPSTREAM_ERROR_REASONS = {
+    "quotaExceeded",
+    "dailyLimitExceeded",
+    "rateLimitExceeded",
+    "userRateLimitExceeded",
+    "keyInvalid",
+    "keyExpired",
+    "accessNotConfigured",
+    "ipRefererBlocked"
+}
+
+
+# Circuit breakers for each upstream, configurable through EURIAI_CIRCUIT_* / YOUTUBE_CIRCUIT_* variables
+euriai_breaker = breaker_from_env(
+    "Euriai",
+    "EURIAI_CIRCUIT",
+    failure_exceptions=(requests.exceptions.RequestException,),
+    is_failure=is_upstream_request_error,
+    default_call_timeout=EURIAI_CALL_TIMEOUT
+)
+youtube_breaker = breaker_from_env(
+    "YouTube",
+    "YOUTUBE_CIRCUIT",
+    failure_exceptions=(TranscriptFetchError,),
+    default_call_timeout=YOUTUBE_CALL_TIMEOUT
+)
+
+# Last good summaries and transcripts, served while an upstream is unavailable
+fallback = DegradedFallback()
+
+# Initialize YouTube API client with a socket timeout so hung requests free their worker thread
+youtube = build(
+    "youtube",
+    "v3",
+    developerKey=youtube_api_key,
+    http=httplib2.Http(timeout=youtube_breaker.call_timeout)
+)
+
 def extract_video_id(youtube_url: str) -> str:
     """
     Extract YouTube video ID from URL, including support for Shorts.
@@ -57,6 +110,28 @@ def extract_video_id(youtube_url: str) -> str:
     
     raise ValueError("❌ Invalid YouTube URL format. Please provide a valid YouTube video URL.")
 
+def _is_upstream_http_error(error: HttpError) -> bool:
+    """
+    Check whether a YouTube API error is caused by the service rather than the video.
+    
+    Args:
+        error: HttpError raised by the YouTube API client
+        
+    Returns:
+        True for auth, quota, rate limit and server errors
+    """
+    status = error.resp.status
+    if status in [401, 429] or status >= 500:
+        return True
+
+    # Quota and key errors come back as 400/403, like per-video errors, so check the reason
+    try:
+        details = json.loads(error.content.decode("utf-8")).get("error", {})
+        reasons = {item.get("reason") for item in details.get("errors", [])}
+    except (ValueError, AttributeError):
+        return False
+    return bool(reasons & UPSTREAM_ERROR_REASONS)
+
 def get_transcript(video_id: str) -> str:
     """
     Get and format transcript for a YouTube video using YouTube Data API.
@@ -68,7 +143,8 @@ def get_transcript(video_id: str) -> str:
         Formatted transcript text
         
     Raises:
-        ValueError: If transcripts are unavailable or an error occurs
+        ValueError: If transcripts are unavailable for the video
+        TranscriptFetchError: If the YouTube API fails
     """
     try:
         # Fetch available captions for the video
@@ -117,12 +193,28 @@ def get_transcript(video_id: str) -> str:
         return formatted_text
 
     except HttpError as e:
+        if _is_upstream_http_error(e):
+            raise TranscriptFetchError(f"❌ YouTube API error: {str(e)}")
         if e.resp.status in [403, 404]:
             raise ValueError("❌ Captions are disabled or not available for this video.")
         raise ValueError(f"❌ Error fetching transcript: {str(e)}")
+    except ValueError:
+        raise
+    except (httplib2.HttpLib2Error, OSError) as e:
+        # Network and timeout errors (socket.timeout and ConnectionError are OSErrors)
+        raise TranscriptFetchError(f"❌ Error fetching transcript: {str(e)}")
     except Exception as e:
         raise ValueError(f"❌ Error fetching transcript: {str(e)}")
 
+def get_resilience_status() -> Dict[str, Any]:
+    """
+    Report the state of the upstream circuit breakers.
+
+    Returns:
+        Dictionary with a snapshot of each breaker and the number of requests served degraded
+    """
+    return resilience_status({"euriai": euriai_breaker, "youtube": youtube_breaker}, fallback)
+
 def summarize_youtube_video_full(url: str) -> Dict[str, Any]:
     """
     Summarize a YouTube video from its URL using YouTube Data API.
@@ -137,8 +229,12 @@ def summarize_youtube_video_full(url: str) -> Dict[str, Any]:
         # Extract video ID
         video_id = extract_video_id(url)
         
-        # Get transcript
-        raw_text = get_transcript(video_id)
+        # Get transcript, falling back to cached data if the YouTube API is unavailable
+        try:
+            raw_text = youtube_breaker.call(get_transcript, video_id)
+            fallback.remember_transcript(video_id, raw_text)
+        except (CircuitOpenError, UpstreamTimeoutError, TranscriptFetchError) as e:
+            return fallback.respond(video_id, url, youtube_breaker.name, str(e))
         
         # Clip transcript if too long
         if len(raw_text) > MAX_TRANSCRIPT_LENGTH:
@@ -161,12 +257,21 @@ Transcript:{truncation_notice}
 {clipped_text}
 """
 
-        # Generate completion
-        response = client.generate_completion(
-            prompt=summary_prompt,
-            temperature=0.6,
-            max_tokens=3000
-        )
+        # Generate completion, falling back to a degraded summary if Euriai is unavailable
+        try:
+            response = euriai_breaker.call(
+                client.generate_completion,
+                prompt=summary_prompt,
+                temperature=0.6,
+                max_tokens=3000
+            )
+        except (CircuitOpenError, UpstreamTimeoutError) as e:
+            return fallback.respond(video_id, url, euriai_breaker.name, str(e))
+        except requests.exceptions.RequestException as e:
+            # EuriaiClient raises requests errors; 4xx errors caused by the request itself are not outages
+            if not is_upstream_request_error(e):
+                raise
+            return fallback.respond(video_id, url, euriai_breaker.name, str(e))
         
         # Handle different response formats
         generated_text = ""
@@ -194,8 +299,11 @@ Transcript:{truncation_notice}
             elif "generated_text" in response:
                 generated_text = response["generated_text"]
                 
-        # If we couldn't extract text, use the raw response as a fallback
-        if not generated_text:
+        # If we couldn't extract text, use the raw response as a fallback;
+        # only real completions are kept for serving during outages
+        if generated_text:
+            fallback.remember_summary(video_id, generated_text)
+        else:
             generated_text = str(response)
 
         return {
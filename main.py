@@ -1,6 +1,6 @@
 import streamlit as st
 import re
-from youtube_summary_full import summarize_youtube_video_full
+from youtube_summary_full import summarize_youtube_video_full, get_resilience_status
 
 # Page configuration
 st.set_page_config(
@@ -193,6 +193,14 @@ if st.button("Summarize Video"):
                 else:
                     status.update(label="Summary complete!", state="complete")
                     
+                    # Let the user know when the summary was served without one of the upstream services
+                    if summary.get('degraded'):
+                        upstream = summary.get('degraded_upstream', 'An upstream service')
+                        if summary.get('degraded_source') == 'cache':
+                            st.warning(f"{upstream} is unavailable. Showing a previously generated summary for this video.")
+                        else:
+                            st.warning(f"{upstream} is unavailable. Showing a basic summary extracted from the transcript.")
+                    
                     # Parse and format the summary output
                     formatted_data = format_summary(summary['response'])
                     
@@ -267,6 +275,13 @@ if st.button("Summarize Video"):
                         mime="text/plain"
                     )
 
+# Service status
+with st.sidebar.expander("Service Status"):
+    service_status = get_resilience_status()
+    st.write(f"**Euriai:** {service_status['euriai']['state']}")
+    st.write(f"**YouTube:** {service_status['youtube']['state']}")
+    st.write(f"**Degraded responses served:** {service_status['degraded_requests']}")
+
 # Footer
 st.markdown("---")
 st.markdown("Made with ❤️ using Streamlit and EuriAI")
\ No newline at end of file
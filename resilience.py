@@ -0,0 +1,543 @@
+# resilience.py
+
+import concurrent.futures
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Circuit breaker states
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# Default breaker settings (overridable per upstream through environment variables)
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_TIMEOUT = 30.0
+DEFAULT_HALF_OPEN_MAX_CALLS = 1
+DEFAULT_MAX_CONCURRENT_CALLS = 8
+
+# Slow successful calls are not counted as failures by default: the check only
+# runs after the call has returned, and a long but healthy LLM generation would
+# otherwise trip the breaker. Hung calls are handled by the call timeout instead.
+DEFAULT_SLOW_CALL_THRESHOLD: Optional[float] = None
+
+# Number of summaries kept for stale fallback
+DEFAULT_CACHE_SIZE = 256
+
+# Common words ignored when scoring transcript lines
+STOPWORDS = {
+    "a", "about", "all", "also", "am", "an", "and", "any", "are", "as", "at", "be",
+    "because", "been", "but", "by", "can", "could", "did", "do", "does", "don't", "for",
+    "from", "get", "got", "had", "has", "have", "he", "her", "here", "him", "his", "how",
+    "i", "i'm", "if", "in", "into", "is", "it", "it's", "its", "just", "know", "like",
+    "me", "more", "my", "no", "not", "now", "of", "oh", "ok", "okay", "on", "one", "or",
+    "our", "out", "really", "right", "say", "she", "so", "some", "that", "that's", "the",
+    "their", "them", "then", "there", "these", "they", "this", "to", "um", "uh", "up",
+    "us", "very", "was", "we", "well", "were", "what", "when", "where", "which", "who",
+    "will", "with", "would", "yeah", "you", "your",
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open."""
+
+
+class UpstreamTimeoutError(Exception):
+    """Raised when a call through the circuit breaker does not finish within its call timeout."""
+
+
+class TranscriptFetchError(ValueError):
+    """Raised when the transcript service itself fails, as opposed to the video having no transcript."""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker guarding calls to a single upstream service.
+
+    After `failure_threshold` consecutive failures the breaker opens and rejects
+    calls immediately. Once `recovery_timeout` seconds have passed it moves to
+    half-open and lets up to `half_open_max_calls` probe calls through: a
+    successful probe closes the breaker, a failed one opens it again. A probe
+    still outstanding after another `recovery_timeout` counts as failed.
+
+    With a `call_timeout`, calls run on a bounded thread pool and the caller
+    stops waiting after that many seconds; the timeout counts as a failure.
+    The upstream clients have no timeouts of their own, so this is what keeps
+    hung calls from piling up request threads.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT,
+        half_open_max_calls: int = DEFAULT_HALF_OPEN_MAX_CALLS,
+        slow_call_threshold: Optional[float] = DEFAULT_SLOW_CALL_THRESHOLD,
+        failure_exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+        is_failure: Optional[Callable[[BaseException], bool]] = None,
+        call_timeout: Optional[float] = None,
+        max_concurrent_calls: int = DEFAULT_MAX_CONCURRENT_CALLS,
+    ):
+        """
+        Args:
+            name: Upstream name, used in status reports and error messages
+            failure_threshold: Consecutive failures needed to open the breaker
+            recovery_timeout: Seconds to stay open before probing the upstream
+            half_open_max_calls: Concurrent probe calls allowed while half-open
+            slow_call_threshold: Calls slower than this many seconds count as
+                failures even if they succeed (None, the default, disables the check)
+            failure_exceptions: Exceptions that indicate the upstream is failing;
+                any other exception is re-raised without tripping the breaker
+            is_failure: Optional check narrowing `failure_exceptions` further,
+                e.g. to tell outages apart from errors caused by the request
+            call_timeout: Seconds to wait for a call before giving up on it
+                (None runs calls directly on the caller's thread)
+            max_concurrent_calls: Size of the thread pool used with `call_timeout`
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.slow_call_threshold = slow_call_threshold
+        self.failure_exceptions = failure_exceptions
+        self.is_failure = is_failure
+        self.call_timeout = call_timeout
+        self._executor = None
+        if call_timeout is not None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, max_concurrent_calls),
+                thread_name_prefix=f"{name}-breaker",
+            )
+
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._failure_count = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._half_open_round = 0
+        self._probe_started_at = 0.0
+        self._rejected_count = 0
+
+    @property
+    def state(self) -> str:
+        """Current breaker state, promoting open to half-open once the timeout has passed."""
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def _refresh_state(self) -> None:
+        # Caller must hold the lock
+        now = time.monotonic()
+        if self._state == STATE_OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = STATE_HALF_OPEN
+            self._half_open_calls = 0
+            self._half_open_round += 1
+        elif (
+            self._state == STATE_HALF_OPEN
+            and self._half_open_calls
+            and now - self._probe_started_at >= self.recovery_timeout
+        ):
+            # A hung probe would otherwise hold the breaker half-open forever; its
+            # result is ignored once it finishes since it belongs to an old round
+            self._failure_count += 1
+            self._open()
+
+    def _open(self) -> None:
+        # Caller must hold the lock
+        self._state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self._half_open_calls = 0
+
+    def allow_request(self) -> Tuple[bool, Optional[int]]:
+        """
+        Check whether a call may go to the upstream right now.
+
+        Returns:
+            Tuple of whether the call is allowed and, for half-open probe calls,
+            the probe round to pass back to `record_success` / `record_failure`
+            (None for regular calls)
+        """
+        with self._lock:
+            self._refresh_state()
+            if self._state == STATE_CLOSED:
+                return True, None
+            if self._state == STATE_HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                if not self._half_open_calls:
+                    self._probe_started_at = time.monotonic()
+                self._half_open_calls += 1
+                return True, self._half_open_round
+            self._rejected_count += 1
+            return False, None
+
+    def _is_current_probe(self, probe_round: Optional[int]) -> bool:
+        # Caller must hold the lock
+        return self._state == STATE_HALF_OPEN and probe_round == self._half_open_round
+
+    def record_success(self, probe_round: Optional[int] = None) -> None:
+        """
+        Record a successful call.
+
+        Only a probe from the current half-open round closes the breaker; late
+        successes from calls admitted before the breaker opened are ignored.
+
+        Args:
+            probe_round: Probe round returned by `allow_request`, None for regular calls
+        """
+        with self._lock:
+            self._refresh_state()
+            if self._state == STATE_CLOSED:
+                self._failure_count = 0
+            elif self._is_current_probe(probe_round):
+                self._failure_count = 0
+                self._state = STATE_CLOSED
+                self._half_open_calls = 0
+
+    def record_failure(self, probe_round: Optional[int] = None) -> None:
+        """
+        Record a failed call.
+
+        Opens the breaker when the threshold is reached, or when a probe from
+        the current half-open round fails. Late failures from calls admitted
+        before the breaker opened are ignored.
+
+        Args:
+            probe_round: Probe round returned by `allow_request`, None for regular calls
+        """
+        with self._lock:
+            self._refresh_state()
+            if self._state == STATE_CLOSED:
+                self._failure_count += 1
+                if self._failure_count >= self.failure_threshold:
+                    self._open()
+            elif self._is_current_probe(probe_round):
+                self._failure_count += 1
+                self._open()
+
+    def _run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        # Run the call, giving up after `call_timeout` if one is set
+        if self._executor is None:
+            return func(*args, **kwargs)
+
+        future = self._executor.submit(func, *args, **kwargs)
+        done, _ = concurrent.futures.wait([future], timeout=self.call_timeout)
+        if not done:
+            # Drops the call if it is still queued; a running call is left to finish on its own
+            future.cancel()
+            raise UpstreamTimeoutError(f"❌ {self.name} did not respond within {self.call_timeout:g} seconds.")
+        return future.result()
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call `func` through the breaker.
+
+        Args:
+            func: Callable that talks to the upstream
+            *args, **kwargs: Arguments passed to `func`
+
+        Returns:
+            Whatever `func` returns
+
+        Raises:
+            CircuitOpenError: If the breaker is open and the call was rejected
+            UpstreamTimeoutError: If the call did not finish within `call_timeout`
+        """
+        allowed, probe_round = self.allow_request()
+        if not allowed:
+            raise CircuitOpenError(f"❌ {self.name} is temporarily unavailable (circuit open).")
+
+        started = time.monotonic()
+        try:
+            result = self._run(func, *args, **kwargs)
+        except UpstreamTimeoutError:
+            self.record_failure(probe_round)
+            raise
+        except self.failure_exceptions as e:
+            if self.is_failure is None or self.is_failure(e):
+                self.record_failure(probe_round)
+            else:
+                self.record_success(probe_round)
+            raise
+        except Exception:
+            # The upstream answered, the request itself was just not servable
+            self.record_success(probe_round)
+            raise
+
+        elapsed = time.monotonic() - started
+        if self.slow_call_threshold is not None and elapsed > self.slow_call_threshold:
+            self.record_failure(probe_round)
+        else:
+            self.record_success(probe_round)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get a point-in-time view of the breaker for status reporting.
+
+        Returns:
+            Dictionary with the state, failure count, rejected call count and settings
+        """
+        with self._lock:
+            self._refresh_state()
+            return {
+                "name": self.name,
+                "state": self._state,
+                "failure_count": self._failure_count,
+                "rejected_count": self._rejected_count,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+                "call_timeout": self.call_timeout,
+            }
+
+
+def is_upstream_request_error(error: BaseException) -> bool:
+    """
+    Check whether a `requests` error means the upstream is failing rather than the request being bad.
+
+    Args:
+        error: Exception raised by a requests-based client
+
+    Returns:
+        True for network and timeout errors and for 401, 403, 429 and 5xx responses;
+        False for other 4xx responses, such as an oversized prompt
+    """
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status in [401, 403, 429] or status >= 500
+    return isinstance(error, requests.exceptions.RequestException)
+
+
+def _env_number(name: str, default: float, cast: Callable[[str], float]) -> float:
+    # Read a non-negative number from the environment, falling back to the default
+    # on bad values so a typo in the config does not stop the app from starting
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = cast(raw.strip())
+    except ValueError:
+        logger.warning("Ignoring invalid %s=%r, using %s", name, raw, default)
+        return default
+    if value < 0:
+        logger.warning("Ignoring negative %s=%r, using %s", name, raw, default)
+        return default
+    return value
+
+
+def breaker_from_env(
+    name: str,
+    env_prefix: str,
+    failure_exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+    is_failure: Optional[Callable[[BaseException], bool]] = None,
+    default_call_timeout: Optional[float] = None,
+) -> CircuitBreaker:
+    """
+    Build a circuit breaker whose settings can be overridden from the environment.
+
+    Reads `<PREFIX>_FAILURE_THRESHOLD`, `<PREFIX>_RECOVERY_TIMEOUT`,
+    `<PREFIX>_HALF_OPEN_MAX_CALLS`, `<PREFIX>_CALL_TIMEOUT`,
+    `<PREFIX>_MAX_CONCURRENT_CALLS` and `<PREFIX>_SLOW_CALL_THRESHOLD`.
+    Setting the call timeout to 0 disables it; slow-call detection is off
+    unless its threshold is set to a positive value.
+    Invalid or negative values are logged and replaced by the defaults.
+
+    Args:
+        name: Upstream name
+        env_prefix: Prefix of the environment variables, e.g. "EURIAI_CIRCUIT"
+        failure_exceptions: Exceptions that count as upstream failures
+        is_failure: Optional check narrowing `failure_exceptions` further
+        default_call_timeout: Call timeout in seconds when the environment does not set one
+
+    Returns:
+        A configured CircuitBreaker
+    """
+    call_timeout = _env_number(f"{env_prefix}_CALL_TIMEOUT", default_call_timeout or 0, float)
+    slow_call_threshold = _env_number(f"{env_prefix}_SLOW_CALL_THRESHOLD", DEFAULT_SLOW_CALL_THRESHOLD or 0, float)
+    return CircuitBreaker(
+        name=name,
+        failure_threshold=_env_number(f"{env_prefix}_FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD, int),
+        recovery_timeout=_env_number(f"{env_prefix}_RECOVERY_TIMEOUT", DEFAULT_RECOVERY_TIMEOUT, float),
+        half_open_max_calls=_env_number(f"{env_prefix}_HALF_OPEN_MAX_CALLS", DEFAULT_HALF_OPEN_MAX_CALLS, int),
+        slow_call_threshold=slow_call_threshold if slow_call_threshold > 0 else None,
+        failure_exceptions=failure_exceptions,
+        is_failure=is_failure,
+        call_timeout=call_timeout if call_timeout > 0 else None,
+        max_concurrent_calls=_env_number(
+            f"{env_prefix}_MAX_CONCURRENT_CALLS", DEFAULT_MAX_CONCURRENT_CALLS, int
+        ),
+    )
+
+
+class LRUCache:
+    """Small thread-safe LRU cache used to keep summaries and transcripts for fallback."""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.max_size = max(1, max_size)
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+class RequestCounter:
+    """Thread-safe counter, used to track requests served in degraded mode."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0
+
+    def increment(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+    @property
+    def value(self) -> int:
+        with self._lock:
+            return self._value
+
+
+def _parse_transcript_lines(transcript: str) -> List[Tuple[int, str]]:
+    # Turn "[MM:SS] text" lines into (seconds, text) pairs
+    entries = []
+    for line in transcript.splitlines():
+        match = re.match(r"\[(\d+):(\d{2})\]\s*(.*)", line)
+        if match and match.group(3).strip():
+            seconds = int(match.group(1)) * 60 + int(match.group(2))
+            entries.append((seconds, match.group(3).strip()))
+    return entries
+
+
+def _tokenize(text: str) -> List[str]:
+    return [word for word in re.findall(r"[a-z0-9']+", text.lower()) if word not in STOPWORDS and len(word) > 2]
+
+
+def extractive_summary(transcript: str, num_sections: int = 5) -> str:
+    """
+    Build a timestamped summary from the transcript alone, without calling the LLM.
+
+    The transcript is split into `num_sections` equal parts and the most
+    representative line of each part (by keyword frequency) is kept.
+
+    Args:
+        transcript: Formatted transcript with "[MM:SS] text" lines
+        num_sections: Number of timestamped sections to produce
+
+    Returns:
+        Markdown summary in the same layout as the LLM output
+    """
+    entries = _parse_transcript_lines(transcript)
+    if not entries:
+        return "**1. Timestamped Summary:**\nNo transcript content available for a local summary."
+
+    frequencies = Counter(word for _, text in entries for word in _tokenize(text))
+
+    def score(text: str) -> float:
+        words = _tokenize(text)
+        if not words:
+            return 0.0
+        return sum(frequencies[word] for word in words) / len(words)
+
+    num_sections = max(1, min(num_sections, len(entries)))
+    section_size = -(-len(entries) // num_sections)  # Ceiling division
+
+    lines = ["**1. Timestamped Summary:**"]
+    for start in range(0, len(entries), section_size):
+        section = entries[start:start + section_size]
+        end_seconds = entries[start + section_size][0] if start + section_size < len(entries) else section[-1][0]
+        best_line = max(section, key=lambda entry: score(entry[1]))[1]
+        lines.append(
+            f"* **{section[0][0] // 60:02d}:{section[0][0] % 60:02d}-"
+            f"{end_seconds // 60:02d}:{end_seconds % 60:02d} Key Point:** {best_line}"
+        )
+
+    return "\n".join(lines)
+
+
+class DegradedFallback:
+    """
+    Keeps the last good summaries and transcripts and answers from them while
+    an upstream is unavailable.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.summary_cache = LRUCache(max_size)
+        self.transcript_cache = LRUCache(max_size)
+        self.degraded_requests = RequestCounter()
+
+    def remember_transcript(self, video_id: str, transcript: str) -> None:
+        self.transcript_cache.set(video_id, transcript)
+
+    def remember_summary(self, video_id: str, summary: str) -> None:
+        self.summary_cache.set(video_id, summary)
+
+    def respond(self, video_id: str, url: str, upstream: str, reason: str) -> Dict[str, Any]:
+        """
+        Build a response without the failing upstream.
+
+        Serves the last cached summary for the video if there is one, otherwise
+        an extractive summary of the cached transcript.
+
+        Args:
+            video_id: YouTube video ID
+            url: YouTube video URL
+            upstream: Name of the failing upstream
+            reason: Error message from the failing upstream
+
+        Returns:
+            Dictionary with the summary response, or an error if nothing can be served
+        """
+        cached_summary = self.summary_cache.get(video_id)
+        if cached_summary is not None:
+            response, source = cached_summary, "cache"
+        else:
+            transcript = self.transcript_cache.get(video_id)
+            if transcript is None:
+                return {"error": reason, "video_url": url}
+            response, source = extractive_summary(transcript), "extractive"
+
+        self.degraded_requests.increment()
+        return {
+            "video_id": video_id,
+            "video_url": url,
+            "response": response,
+            "degraded": True,
+            "degraded_source": source,
+            "degraded_upstream": upstream,
+            "degraded_reason": reason,
+        }
+
+
+def resilience_status(breakers: Dict[str, CircuitBreaker], fallback: DegradedFallback) -> Dict[str, Any]:
+    """
+    Report the state of the upstream circuit breakers.
+
+    Args:
+        breakers: Breakers keyed by the name to report them under
+        fallback: Fallback whose degraded response count is reported
+
+    Returns:
+        Dictionary with a snapshot of each breaker and the number of requests served degraded
+    """
+    status: Dict[str, Any] = {key: breaker.snapshot() for key, breaker in breakers.items()}
+    status["degraded_requests"] = fallback.degraded_requests.value
+    return status
@@ -0,0 +1,283 @@
+# test_resilience.py
+
+import threading
+
+import pytest
+import requests
+
+import resilience
+from resilience import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    DegradedFallback,
+    UpstreamTimeoutError,
+    breaker_from_env,
+    extractive_summary,
+    is_upstream_request_error,
+)
+
+
+class FakeClock:
+    """Stands in for time.monotonic so state changes don't depend on sleeping."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", fake)
+    return fake
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    settings = {"failure_threshold": 2, "recovery_timeout": 10.0}
+    settings.update(kwargs)
+    return CircuitBreaker("test", **settings)
+
+
+def fail():
+    raise RuntimeError("upstream down")
+
+
+def trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+
+
+def test_breaker_opens_probes_and_closes(clock):
+    breaker = make_breaker()
+    assert breaker.state == STATE_CLOSED
+
+    trip(breaker)
+    assert breaker.state == STATE_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
+
+    clock.advance(10)
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == STATE_CLOSED
+    assert breaker.snapshot()["rejected_count"] == 1
+
+
+def test_failed_probe_reopens_breaker(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.advance(10)
+
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == STATE_OPEN
+
+    clock.advance(9)
+    assert breaker.state == STATE_OPEN
+
+
+def test_half_open_limits_concurrent_probes(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.advance(10)
+
+    allowed, probe_round = breaker.allow_request()
+    assert allowed and probe_round is not None
+    assert breaker.allow_request() == (False, None)
+
+
+def test_hung_probe_reopens_breaker_after_deadline(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.advance(10)
+
+    _, hung_probe = breaker.allow_request()
+    clock.advance(9)
+    assert breaker.state == STATE_HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
+
+    clock.advance(1)
+    assert breaker.state == STATE_OPEN
+
+    clock.advance(10)
+    assert breaker.state == STATE_HALF_OPEN
+    breaker.record_success(hung_probe)
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == STATE_CLOSED
+
+
+def test_non_failure_exceptions_do_not_trip(clock):
+    breaker = make_breaker(failure_exceptions=(RuntimeError,))
+    for _ in range(5):
+        with pytest.raises(KeyError):
+            breaker.call(lambda: {}["missing"])
+    assert breaker.state == STATE_CLOSED
+
+
+def http_error(status: int) -> requests.exceptions.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(f"{status} error", response=response)
+
+
+@pytest.mark.parametrize("status, expected", [(400, False), (413, False), (422, False),
+                                              (401, True), (403, True), (429, True), (503, True)])
+def test_is_upstream_request_error_by_status(status, expected):
+    assert is_upstream_request_error(http_error(status)) is expected
+
+
+def test_is_upstream_request_error_transport_errors():
+    assert is_upstream_request_error(requests.exceptions.ConnectionError("refused"))
+    assert is_upstream_request_error(requests.exceptions.Timeout("slow"))
+    assert not is_upstream_request_error(ValueError("bad"))
+
+
+def test_client_errors_do_not_trip_breaker(clock):
+    breaker = make_breaker(
+        failure_exceptions=(requests.exceptions.RequestException,),
+        is_failure=is_upstream_request_error,
+    )
+
+    def bad_request():
+        raise http_error(413)
+
+    for _ in range(5):
+        with pytest.raises(requests.exceptions.HTTPError):
+            breaker.call(bad_request)
+    assert breaker.state == STATE_CLOSED
+
+    def server_error():
+        raise http_error(502)
+
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(requests.exceptions.HTTPError):
+            breaker.call(server_error)
+    assert breaker.state == STATE_OPEN
+
+
+def test_late_results_from_regular_calls_are_ignored(clock):
+    breaker = make_breaker()
+    allowed, regular = breaker.allow_request()
+    assert allowed and regular is None
+
+    trip(breaker)
+    breaker.record_success(regular)
+    assert breaker.state == STATE_OPEN
+
+    clock.advance(10)
+    assert breaker.state == STATE_HALF_OPEN
+    breaker.record_failure(regular)
+    assert breaker.state == STATE_HALF_OPEN
+    breaker.record_success(regular)
+    assert breaker.state == STATE_HALF_OPEN
+
+
+def test_late_results_from_stale_probes_are_ignored(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.advance(10)
+
+    _, stale_probe = breaker.allow_request()
+    breaker.record_failure(stale_probe)
+    assert breaker.state == STATE_OPEN
+
+    clock.advance(10)
+    assert breaker.state == STATE_HALF_OPEN
+    breaker.record_success(stale_probe)
+    assert breaker.state == STATE_HALF_OPEN
+
+
+def test_call_timeout_counts_as_failure():
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=10.0, call_timeout=0.05)
+    release = threading.Event()
+    try:
+        with pytest.raises(UpstreamTimeoutError):
+            breaker.call(release.wait)
+        assert breaker.state == STATE_OPEN
+    finally:
+        release.set()
+
+
+def test_call_timeout_passes_results_and_errors_through():
+    breaker = CircuitBreaker("test", call_timeout=1.0)
+    assert breaker.call(lambda value: value * 2, 21) == 42
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.snapshot()["failure_count"] == 1
+
+
+def test_breaker_from_env_reads_settings(monkeypatch):
+    monkeypatch.setenv("TEST_CIRCUIT_FAILURE_THRESHOLD", "3")
+    monkeypatch.setenv("TEST_CIRCUIT_RECOVERY_TIMEOUT", "2.5")
+    monkeypatch.setenv("TEST_CIRCUIT_HALF_OPEN_MAX_CALLS", "2")
+    monkeypatch.setenv("TEST_CIRCUIT_SLOW_CALL_THRESHOLD", "0")
+    monkeypatch.setenv("TEST_CIRCUIT_CALL_TIMEOUT", "12")
+
+    breaker = breaker_from_env("test", "TEST_CIRCUIT", default_call_timeout=60)
+    assert breaker.failure_threshold == 3
+    assert breaker.recovery_timeout == 2.5
+    assert breaker.half_open_max_calls == 2
+    assert breaker.slow_call_threshold is None
+    assert breaker.call_timeout == 12
+
+
+def test_breaker_from_env_call_timeout_default_and_disable(monkeypatch):
+    assert breaker_from_env("test", "TEST_CIRCUIT", default_call_timeout=60).call_timeout == 60
+
+    monkeypatch.setenv("TEST_CIRCUIT_CALL_TIMEOUT", "0")
+    assert breaker_from_env("test", "TEST_CIRCUIT", default_call_timeout=60).call_timeout is None
+
+
+@pytest.mark.parametrize("threshold, timeout", [("five", "soon"), ("1.5", "-1"), ("-1", "   ")])
+def test_breaker_from_env_ignores_invalid_values(monkeypatch, threshold, timeout):
+    monkeypatch.setenv("TEST_CIRCUIT_FAILURE_THRESHOLD", threshold)
+    monkeypatch.setenv("TEST_CIRCUIT_RECOVERY_TIMEOUT", timeout)
+
+    breaker = breaker_from_env("test", "TEST_CIRCUIT")
+    assert breaker.failure_threshold == resilience.DEFAULT_FAILURE_THRESHOLD
+    assert breaker.recovery_timeout == resilience.DEFAULT_RECOVERY_TIMEOUT
+
+
+def test_extractive_summary_empty_transcript():
+    summary = extractive_summary("")
+    assert summary.startswith("**1. Timestamped Summary:**")
+    assert "No transcript content" in summary
+
+
+def test_extractive_summary_picks_one_line_per_section():
+    transcript = "\n".join(
+        f"[{i // 60:02d}:{i % 60:02d}] " + ("python decorators wrap python functions" if i % 30 == 0 else "um yeah so")
+        for i in range(0, 300, 10)
+    )
+
+    lines = extractive_summary(transcript, num_sections=5).splitlines()
+    assert lines[0] == "**1. Timestamped Summary:**"
+    assert len(lines) == 6
+    assert lines[1] == "* **00:00-01:00 Key Point:** python decorators wrap python functions"
+    assert all("python decorators" in line for line in lines[1:])
+
+
+def test_degraded_fallback_prefers_cached_summary():
+    fallback = DegradedFallback()
+    assert "error" in fallback.respond("abc", "url", "Euriai", "down")
+
+    fallback.remember_transcript("abc", "[00:00] python decorators explained")
+    response = fallback.respond("abc", "url", "Euriai", "down")
+    assert response["degraded_source"] == "extractive"
+
+    fallback.remember_summary("abc", "cached summary")
+    response = fallback.respond("abc", "url", "YouTube", "down")
+    assert response["response"] == "cached summary"
+    assert response["degraded_upstream"] == "YouTube"
+    assert fallback.degraded_requests.value == 2
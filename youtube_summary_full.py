@@ -2,11 +2,31 @@
 
 import os
 import re
+import requests
 import streamlit as st
 from typing import Dict, Any
 from dotenv import load_dotenv
 from euriai import EuriaiClient
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
+from youtube_transcript_api import (
+    YouTubeTranscriptApi,
+    TranscriptsDisabled,
+    NoTranscriptFound,
+    VideoUnavailable,
+    VideoUnplayable,
+    InvalidVideoId,
+    AgeRestricted,
+    RequestBlocked,
+    YouTubeRequestFailed
+)
+from resilience import (
+    CircuitOpenError,
+    DegradedFallback,
+    TranscriptFetchError,
+    UpstreamTimeoutError,
+    breaker_from_env,
+    is_upstream_request_error,
+    resilience_status
+)
 
 # Load environment variables
 load_dotenv()
@@ -26,6 +46,29 @@ client = EuriaiClient(
 # Maximum transcript length to process
 MAX_TRANSCRIPT_LENGTH = 8000
 
+# Default seconds to wait for each upstream (override with <PREFIX>_CALL_TIMEOUT);
+# a 3000-token completion can legitimately take over a minute
+EURIAI_CALL_TIMEOUT = 120.0
+YOUTUBE_CALL_TIMEOUT = 20.0
+
+# Circuit breakers for each upstream, configurable through EURIAI_CIRCUIT_* / YOUTUBE_CIRCUIT_* variables
+euriai_breaker = breaker_from_env(
+    "Euriai",
+    "EURIAI_CIRCUIT",
+    failure_exceptions=(requests.exceptions.RequestException,),
+    is_failure=is_upstream_request_error,
+    default_call_timeout=EURIAI_CALL_TIMEOUT
+)
+youtube_breaker = breaker_from_env(
+    "YouTube",
+    "YOUTUBE_CIRCUIT",
+    failure_exceptions=(TranscriptFetchError,),
+    default_call_timeout=YOUTUBE_CALL_TIMEOUT
+)
+
+# Last good summaries and transcripts, served while an upstream is unavailable
+fallback = DegradedFallback()
+
 def extract_video_id(youtube_url: str) -> str:
     """
     Extract YouTube video ID from URL, including support for Shorts.
@@ -65,7 +108,8 @@ def get_transcript(video_id: str) -> str:
         Formatted transcript text
         
     Raises:
-        Various exceptions for transcript issues
+        ValueError: If transcripts are unavailable for the video
+        TranscriptFetchError: If the transcript service fails
     """
     try:
         transcript = YouTubeTranscriptApi.get_transcript(video_id)
@@ -90,9 +134,25 @@ def get_transcript(video_id: str) -> str:
         raise ValueError("❌ Transcripts are disabled for this video. Many YouTube Shorts don't have transcripts available.")
     except NoTranscriptFound:
         raise ValueError("❌ No transcript found for this video. Many YouTube Shorts don't have transcripts available.")
+    except (VideoUnavailable, InvalidVideoId):
+        raise ValueError("❌ This video is unavailable. Please check that the URL is correct and the video is public.")
+    except (AgeRestricted, VideoUnplayable):
+        raise ValueError("❌ This video can't be played without signing in, so its transcript can't be fetched.")
+    except (RequestBlocked, YouTubeRequestFailed, requests.exceptions.RequestException) as e:
+        # IpBlocked is a subclass of RequestBlocked; these mean YouTube itself is failing
+        raise TranscriptFetchError(f"❌ Error fetching transcript: {str(e)}")
     except Exception as e:
         raise ValueError(f"❌ Error fetching transcript: {str(e)}")
 
+def get_resilience_status() -> Dict[str, Any]:
+    """
+    Report the state of the upstream circuit breakers.
+
+    Returns:
+        Dictionary with a snapshot of each breaker and the number of requests served degraded
+    """
+    return resilience_status({"euriai": euriai_breaker, "youtube": youtube_breaker}, fallback)
+
 def summarize_youtube_video_full(url: str) -> Dict[str, Any]:
     """
     Summarize a YouTube video from its URL.
@@ -107,8 +167,12 @@ def summarize_youtube_video_full(url: str) -> Dict[str, Any]:
         # Extract video ID
         video_id = extract_video_id(url)
         
-        # Get transcript
-        raw_text = get_transcript(video_id)
+        # Get transcript, falling back to cached data if YouTube is unavailable
+        try:
+            raw_text = youtube_breaker.call(get_transcript, video_id)
+            fallback.remember_transcript(video_id, raw_text)
+        except (CircuitOpenError, UpstreamTimeoutError, TranscriptFetchError) as e:
+            return fallback.respond(video_id, url, youtube_breaker.name, str(e))
         
         # Clip transcript if too long
         if len(raw_text) > MAX_TRANSCRIPT_LENGTH:
@@ -131,12 +195,21 @@ Transcript:{truncation_notice}
 {clipped_text}
 """
 
-        # Generate completion
-        response = client.generate_completion(
-            prompt=summary_prompt,
-            temperature=0.6,
-            max_tokens=3000
-        )
+        # Generate completion, falling back to a degraded summary if Euriai is unavailable
+        try:
+            response = euriai_breaker.call(
+                client.generate_completion,
+                prompt=summary_prompt,
+                temperature=0.6,
+                max_tokens=3000
+            )
+        except (CircuitOpenError, UpstreamTimeoutError) as e:
+            return fallback.respond(video_id, url, euriai_breaker.name, str(e))
+        except requests.exceptions.RequestException as e:
+            # EuriaiClient raises requests errors; 4xx errors caused by the request itself are not outages
+            if not is_upstream_request_error(e):
+                raise
+            return fallback.respond(video_id, url, euriai_breaker.name, str(e))
         
         # Handle different response formats
         generated_text = ""
@@ -164,8 +237,11 @@ Transcript:{truncation_notice}
             elif "generated_text" in response:
                 generated_text = response["generated_text"]
                 
-        # If we couldn't extract text, use the raw response as a fallback
-        if not generated_text:
+        # If we couldn't extract text, use the raw response as a fallback;
+        # only real completions are kept for serving during outages
+        if generated_text:
+            fallback.remember_summary(video_id, generated_text)
+        else:
             generated_text = str(response)
 
         return {